@@ -44,6 +44,8 @@ __date__ = "17 February 2022"
 # We are giving these modules shorter, but distinct, names for convenience
 from random import randint
 
+import numpy as np
+
 from gdpc import geometry as GEO
 from gdpc import interface as INTF
 from gdpc import toolbox as TB
@@ -74,16 +76,37 @@ ROADHEIGHT = 0
 # === STRUCTURE #3
 # Here we are defining all of our functions to keep our code organised
 # They are:
+# - buildWall()
 # - buildPerimeter()
 # - buildRoads()
 # - buildCity()
 
 
+def buildWall(x1, z1, x2, z2, heights, block, wall):
+    """Build a wall along a straight line that follows the terrain.
+
+    Neighbouring pillars of the same height are built as one cuboid,
+        so every step in the terrain only takes two fill commands
+    """
+    # the heightmap starts at the build area, so we use local coordinates
+    ys = heights[x1 - STARTX:x2 - STARTX + 1,
+                 z1 - STARTZ:z2 - STARTZ + 1].ravel()
+    # the wall is split into runs wherever the height changes
+    steps = (np.flatnonzero(np.diff(ys)) + 1).tolist()
+    dx, dz = int(x2 > x1), int(z2 > z1)  # the direction of the wall
+    for start, end in zip([0] + steps, steps + [len(ys)]):
+        y = int(ys[start])
+        fromX, fromZ = x1 + start * dx, z1 + start * dz
+        toX, toZ = x1 + (end - 1) * dx, z1 + (end - 1) * dz
+        GEO.placeCuboid(fromX, y - 2, fromZ, toX, y, toZ, block)
+        GEO.placeCuboid(fromX, y + 1, fromZ, toX, y + 4, toZ, wall)
+
+
 def buildPerimeter():
     """Build a wall along the build area border.
 
     In this function we're building a simple wall around the build area
-        pillar-by-pillar, which means we can adjust to the terrain height
+        run-by-run, which means we can adjust to the terrain height
     """
     # HEIGHTMAP
     # Heightmaps are an easy way to get the uppermost block at any coordinate
@@ -96,28 +119,21 @@ def buildPerimeter():
 
     print("Building east-west walls...")
     # building the east-west walls
-
-    for x in range(STARTX, ENDX + 1):
-        # the northern wall
-        y = heights[(x, STARTZ)]
-        GEO.placeCuboid(x, y - 2, STARTZ, x, y, STARTZ, "granite")
-        GEO.placeCuboid(x, y + 1, STARTZ, x, y + 4, STARTZ, "granite_wall")
-        # the southern wall
-        y = heights[(x, ENDZ)]
-        GEO.placeCuboid(x, y - 2, ENDZ, x, y, ENDZ, "red_sandstone")
-        GEO.placeCuboid(x, y + 1, ENDZ, x, y + 4, ENDZ, "red_sandstone_wall")
+    # the northern wall
+    buildWall(STARTX, STARTZ, ENDX, STARTZ, heights,
+              "granite", "granite_wall")
+    # the southern wall
+    buildWall(STARTX, ENDZ, ENDX, ENDZ, heights,
+              "red_sandstone", "red_sandstone_wall")
 
     print("Building north-south walls...")
     # building the north-south walls
-    for z in range(STARTZ, ENDZ + 1):
-        # the western wall
-        y = heights[(STARTX, z)]
-        GEO.placeCuboid(STARTX, y - 2, z, STARTX, y, z, "sandstone")
-        GEO.placeCuboid(STARTX, y + 1, z, STARTX, y + 4, z, "sandstone_wall")
-        # the eastern wall
-        y = heights[(ENDX, z)]
-        GEO.placeCuboid(ENDX, y - 2, z, ENDX, y, z, "prismarine")
-        GEO.placeCuboid(ENDX, y + 1, z, ENDX, y + 4, z, "prismarine_wall")
+    # the western wall
+    buildWall(STARTX, STARTZ, STARTX, ENDZ, heights,
+              "sandstone", "sandstone_wall")
+    # the eastern wall
+    buildWall(ENDX, STARTZ, ENDX, ENDZ, heights,
+              "prismarine", "prismarine_wall")
 
 
 def buildRoads():
@@ -128,12 +144,12 @@ def buildRoads():
 
     print("Calculating road height...")
     # caclulating the average height along where we want to build our road
-    y = heights[(xaxis, zaxis)]
+    y = heights[(xaxis - STARTX, zaxis - STARTZ)]
     for x in range(STARTX, ENDX + 1):
-        newy = heights[(x, zaxis)]
+        newy = heights[(x - STARTX, zaxis - STARTZ)]
         y = (y + newy) // 2
     for z in range(STARTZ, ENDZ + 1):
-        newy = heights[(xaxis, z)]
+        newy = heights[(xaxis - STARTX, z - STARTZ)]
         y = (y + newy) // 2
 
     # GLOBAL
@@ -269,7 +285,8 @@ if __name__ == '__main__':
     #     possible so you can find mistakes more easily
 
     try:
-        height = WORLDSLICE.heightmaps["MOTION_BLOCKING"][(STARTX, STARTY)]
+        # heightmaps are indexed relative to the build area
+        height = WORLDSLICE.heightmaps["MOTION_BLOCKING"][(0, 0)]
         INTF.runCommand(f"tp @a {STARTX} {height} {STARTZ}")
         print(f"/tp @a {STARTX} {height} {STARTZ}")
         buildPerimeter()
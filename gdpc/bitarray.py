@@ -1,10 +1,13 @@
 #! /usr/bin/python3
 """### Read the bitarray format used by Minecraft."""
-__all__ = ['BitArray']
+__all__ = ['BitArray', 'unpackLongs']
 __version__ = 'v5.0'
 
+from functools import lru_cache
 from math import floor
 
+import numpy as np
+
 
 def inclusiveBetween(start, end, value):
     """**Raise an exception when the value is out of bounds**."""
@@ -14,6 +17,61 @@ def inclusiveBetween(start, end, value):
             f"of {start} to {end}")
 
 
+@lru_cache()
+def entryShifts(bitsPerEntry):
+    """**Return the bit offsets of all entries within a long**."""
+    shifts = np.arange(64 // bitsPerEntry, dtype=np.uint64) * bitsPerEntry
+    shifts.flags.writeable = False  # shared between all calls
+    return shifts
+
+
+def unpack4(longs, arraySize):
+    """**Unpack 4-bit entries, as used by most block state sections**.
+
+    Every byte holds exactly two entries, lowest bits first.
+    """
+    byteArray = longs.astype('<i8', copy=False).view(np.uint8)
+    values = np.empty(byteArray.size * 2, dtype=np.uint16)
+    values[0::2] = byteArray & 0xF
+    values[1::2] = byteArray >> 4
+    return values[:arraySize]
+
+
+def unpack8(longs, arraySize):
+    """**Unpack 8-bit entries, which are exactly the bytes of the longs**."""
+    byteArray = longs.astype('<i8', copy=False).view(np.uint8)
+    return byteArray[:arraySize].astype(np.uint16)
+
+
+SHIFTS9 = np.arange(7, dtype=np.uint64) * 9
+
+
+def unpack9(longs, arraySize):
+    """**Unpack 9-bit entries, as used by heightmaps**."""
+    values = (longs.view(np.uint64)[:, np.newaxis] >> SHIFTS9) \
+        .astype(np.uint16) & np.uint16(0x1FF)
+    return values.ravel()[:arraySize]
+
+
+def unpackLongs(longs, bitsPerEntry, arraySize):
+    """**Unpack an array of longs into arraySize entries at once**.
+
+    Entries do not span multiple longs, as in Minecraft 1.16 and later.
+    """
+    longs = np.asarray(longs, dtype=np.int64)
+    if bitsPerEntry == 4:
+        return unpack4(longs, arraySize)
+    elif bitsPerEntry == 8:
+        return unpack8(longs, arraySize)
+    elif bitsPerEntry == 9:
+        return unpack9(longs, arraySize)
+    longs = longs.view(np.uint64)
+    mask = np.uint64((1 << bitsPerEntry) - 1)
+    values = (longs[:, np.newaxis] >> entryShifts(bitsPerEntry)) & mask
+    dtype = np.uint16 if bitsPerEntry <= 16 else np.uint32
+    return values.ravel()[:arraySize].astype(dtype)
+
+
 class BitArray:
     """**Store an array of binary values and its metrics**.
 
@@ -57,6 +115,12 @@ class BitArray:
         k = (index - i * self.entriesPerLong) * self.bitsPerEntry
         return j >> k & self.maxEntryValue
 
+    def toNumpy(self):
+        """**Return all stored values as a numpy array**."""
+        longs = np.fromiter(self.longArray, dtype=np.int64,
+                            count=len(self.longArray))
+        return unpackLongs(longs, self.bitsPerEntry, self.arraySize)
+
     def size(self):
         """**Return self.arraySize**."""
         return self.arraySize
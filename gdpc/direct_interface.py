@@ -7,15 +7,22 @@ It is recommended to use `interface.py` instead.
 __all__ = []
 __version__ = "v5.0"
 
+from io import BufferedReader
+
 import requests
+from requests.adapters import HTTPAdapter
 from requests.exceptions import ConnectionError
 
+# a persistent session keeps the connection to the server alive
+session = requests.Session()
+session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=32))
+
 
 def getBlock(x, y, z):
     """**Return the block ID from the world**."""
     url = f'http://localhost:9000/blocks?x={x}&y={y}&z={z}'
     try:
-        response = requests.get(url).text
+        response = session.get(url).text
     except ConnectionError:
         return "minecraft:void_air"
     return response
@@ -23,6 +30,14 @@ def getBlock(x, y, z):
 
 def placeBlock(x, y, z, blockStr, doBlockUpdates=True, customFlags=None):
     """**Place one or multiple blocks in the world**."""
+    try:
+        return putBlocks(x, y, z, blockStr, doBlockUpdates, customFlags)
+    except ConnectionError:
+        return "0"
+
+
+def putBlocks(x, y, z, blockStr, doBlockUpdates=True, customFlags=None):
+    """**Place one or multiple blocks, raising ConnectionError on failure**."""
     if customFlags is not None:
         blockUpdateQueryParam = f"customFlags={customFlags}"
     else:
@@ -30,11 +45,7 @@ def placeBlock(x, y, z, blockStr, doBlockUpdates=True, customFlags=None):
 
     url = (f'http://localhost:9000/blocks?x={x}&y={y}&z={z}'
            f'&{blockUpdateQueryParam}')
-    try:
-        response = requests.put(url, blockStr)
-    except ConnectionError:
-        return "0"
-    return response.text
+    return session.put(url, blockStr).text
 
 
 def sendBlocks(blockList, x=0, y=0, z=0, retries=5,
@@ -55,7 +66,7 @@ def runCommand(command):
     """**Run a Minecraft command in the world**."""
     url = 'http://localhost:9000/command'
     try:
-        response = requests.post(url, bytes(command, "utf-8"))
+        response = session.post(url, bytes(command, "utf-8"))
     except ConnectionError:
         return "connection error"
     return response.text
@@ -64,7 +75,7 @@ def runCommand(command):
 def requestBuildArea():
     """**Return the building area**."""
     area = 0, 0, 0, 128, 256, 128   # default area for beginners
-    response = requests.get('http://localhost:9000/buildarea')
+    response = session.get('http://localhost:9000/buildarea')
     if response.ok:
         buildArea = response.json()
         if buildArea != -1:
@@ -84,8 +95,10 @@ def requestBuildArea():
 def getChunks(x, z, dx, dz, rtype='text'):
     """**Get raw chunk data**."""
     url = f'http://localhost:9000/chunks?x={x}&z={z}&dx={dx}&dz={dz}'
-    acceptType = 'application/octet-stream' if rtype == 'bytes' else 'text/raw'
-    response = requests.get(url, headers={"Accept": acceptType})
+    acceptType = 'application/octet-stream' if rtype in ('bytes', 'stream') \
+        else 'text/raw'
+    response = session.get(url, headers={"Accept": acceptType},
+                           stream=rtype == 'stream')
     if response.status_code >= 400:
         print(f"Error: {response.text}")
 
@@ -93,5 +106,9 @@ def getChunks(x, z, dx, dz, rtype='text'):
         return response.text
     elif rtype == 'bytes':
         return response.content
+    elif rtype == 'stream':
+        # file-like object that reads the data as it arrives
+        response.raw.decode_content = True
+        return BufferedReader(response.raw, 64 * 1024)
     else:
         raise Exception(f"{rtype} is not a valid return type.")
@@ -45,22 +45,23 @@ def placePolygon(points, blocks, replace=None, filled=False, interface=gi):
     placeFromList(polygon, blocks, replace, interface)
 
 
-def placeVolume(x1, y1, z1, x2, y2, z2, blocks, replace=None, interface=gi):
-    buffering = interface.isBuffering()
-    if not buffering:
-        interface.setBuffering(True, False)
-        result = placeFromList(toolbox.loop3d(x1, y1, z1, x2, y2, z2),
-                               blocks, replace, interface)
-        interface.setBuffering(False, False)
-        return result
-    return placeFromList(toolbox.loop3d(x1, y1, z1, x2, y2, z2),
-                         blocks, replace, interface)
+def placeVolume(x1, y1, z1, x2, y2, z2, blocks, replace=None, interface=gi,
+                worldSlice=None):
+    """**Fill a cuboid region in as few requests as possible**.
+
+    If given, `worldSlice` is used to check blocks against `replace`.
+    """
+    response = interface.fill(x1, y1, z1, x2, y2, z2, blocks, replace,
+                              worldSlice=worldSlice)
+    if response is not None and response.isnumeric():
+        return int(response)
+    return response
 
 
 def placeCuboid(x1, y1, z1, x2, y2, z2, blocks, replace=None,
-                hollow=False, interface=gi):
+                hollow=False, interface=gi, worldSlice=None):
     """**Place a cubic shape that fills the entire region and may be hollow.**"""
-    settings = blocks, replace, interface
+    settings = blocks, replace, interface, worldSlice
     dimension, _ = getDimension(x1, y1, z1, x2, y2, z2)
 
     if dimension == 0:                       # single block
@@ -13,20 +13,28 @@ __all__ = ['Interface', 'runCommand',
            'getBlockFlags', 'placeBlockFlags',
            'isCaching', 'setCaching', 'getCacheLimit', 'setCacheLimit',
            'isBuffering', 'setBuffering', 'getBufferLimit', 'setBufferLimit',
-           'sendBlocks', 'checkOutOfBounds']
+           'sendBlocks', 'sendBlocksAsync', 'checkOutOfBounds']
 
 __author__ = "Blinkenlights"
 __version__ = "v5.0"
 
+from array import array
 from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import product
 from random import choice
 
 import numpy as np
+from requests.exceptions import ConnectionError
 
 from . import direct_interface as di
 from .lookup import TCOLORS
 from .worldLoader import WorldSlice
 
+FILLLIMIT = 32768       # maximum number of blocks per fill command
+SENDTHREADS = 8         # number of block slices sent concurrently
+MINSLICESIZE = 64       # smaller slices are not worth a separate request
+
 
 class OrderedByLookupDict(OrderedDict):
     """Limit size, evicting the least recently looked-up key when full.
@@ -55,6 +63,72 @@ class OrderedByLookupDict(OrderedDict):
             del self[oldest]
 
 
+class BlockBuffer:
+    """**Store blocks as separate coordinate arrays and a list of blocks**.
+
+    Compared to a list of tuples this saves an object per block
+        and lets the request body be formatted in a single pass.
+    """
+
+    def __init__(self, x=(), y=(), z=(), blocks=()):
+        self.x = array('i', x)
+        self.y = array('i', y)
+        self.z = array('i', z)
+        self.blocks = list(blocks)
+
+    # __repr__ displays the class well enough so __str__ is omitted
+    def __repr__(self):
+        """**Represent the BlockBuffer as a constructor**."""
+        return f"BlockBuffer({self.x.tolist()}, {self.y.tolist()}, " \
+            f"{self.z.tolist()}, {self.blocks})"
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def __iter__(self):
+        return zip(self.x, self.y, self.z, self.blocks)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return BlockBuffer(self.x[key], self.y[key], self.z[key],
+                               self.blocks[key])
+        return self.x[key], self.y[key], self.z[key], self.blocks[key]
+
+    def append(self, x, y, z, blockStr):
+        """**Add a single block**."""
+        self.x.append(x)
+        self.y.append(y)
+        self.z.append(z)
+        self.blocks.append(blockStr)
+
+    def extend(self, other):
+        """**Add all blocks of another BlockBuffer**."""
+        self.x.extend(other.x)
+        self.y.extend(other.y)
+        self.z.extend(other.z)
+        self.blocks.extend(other.blocks)
+
+    def unique(self):
+        """**Return a buffer containing each position once**.
+
+        The block placed last at a position takes precedence.
+        """
+        latest = {position: index for index, position
+                  in enumerate(zip(self.x, self.y, self.z))}
+        if len(latest) == len(self):
+            return self
+        indices = sorted(latest.values())
+        return BlockBuffer([self.x[i] for i in indices],
+                           [self.y[i] for i in indices],
+                           [self.z[i] for i in indices],
+                           [self.blocks[i] for i in indices])
+
+    def body(self):
+        """**Return the blocks as a request body relative to an offset**."""
+        return "\n".join(map("~{} ~{} ~{} {}".format,
+                             self.x, self.y, self.z, self.blocks))
+
+
 class Interface():
     """**Provides tools for interacting with the HTML interface**.
 
@@ -68,13 +142,17 @@ class Interface():
         self.offset = x, y, z
         self.__buffering = buffering
         self.bufferlimit = bufferlimit
-        self.buffer = []    # buffer is in global coordinates
+        self.buffer = BlockBuffer()    # buffer is in global coordinates
         self.placeBlockflags = (True, None)   # (doBlockUpdates, CustomFlags)
         self.bufferblockflags = (True, None)   # (doBlockUpdates, CustomFlags)
         self.caching = caching
         # cache is in global coordinates
         self.cache = OrderedByLookupDict(cachelimit)
         # Interface.cache.maxsize to change size
+        self.__senders = ThreadPoolExecutor(max_workers=SENDTHREADS)
+        # background batches run one at a time to preserve their order
+        self.__dispatcher = ThreadPoolExecutor(max_workers=1)
+        self.__lastBatch = None
 
     def __del__(self):
         """**Clean up before destruction**."""
@@ -99,8 +177,9 @@ class Interface():
             return self.cache[(x, y, z)]
 
         if self.caching and globalWorldSlice is not None:
-            dx, dy, dz = global2buildlocal(x, y, z)  # convert for decay index
-            if not checkOutOfBounds(x, y, z) and not globalDecay[dx][dy][dz]:
+            index = decayIndex(x, y, z)
+            if (not checkOutOfBounds(x, y, z) and index is not None
+                    and not globalDecay[index]):
                 block = globalWorldSlice.getBlockAt(x, y, z)
                 self.cache[(x, y, z)] = block
                 return block
@@ -130,9 +209,9 @@ class Interface():
 
         if self.__buffering:
             response = self.placeBlockBuffered(x, y, z, block, self.bufferlimit,
-                                               flags)
+                                               *flags)
         else:
-            response = self.placeBlockDirect(x, y, z, block, flags)
+            response = self.placeBlockDirect(x, y, z, block, *flags)
 
         # switch to global coordinates
         x, y, z = self.local2global(x, y, z)
@@ -140,8 +219,9 @@ class Interface():
             self.cache[(x, y, z)] = block
         # mark block as decayed
         if not checkOutOfBounds(x, y, z) and globalDecay is not None:
-            x, y, z = global2buildlocal(x, y, z)
-            globalDecay[x][y][z] = True
+            index = decayIndex(x, y, z)
+            if index is not None:
+                globalDecay[index] = True
 
         return response
 
@@ -163,6 +243,182 @@ class Interface():
                   f"upon placing block:\n\t{TCOLORS['CLR']}{result}")
         return result
 
+    def fill(self, x1, y1, z1, x2, y2, z2, block, replace=None,
+             doBlockUpdates=-1, customFlags=-1, worldSlice=None):
+        """**Fill a cuboid region with blocks in as few requests as possible**.
+
+        A single block is placed with fill commands, unless custom flags
+            or disabled block updates require placing every block.
+        If `block` is a sequence, a random block is chosen for every position.
+        If `replace` is given, the fill command takes care of only replacing
+            matching blocks, unless block checks are unavoidable.
+        If block checks are unavoidable and a `worldSlice` is given,
+            blocks that are not cached are looked up in it
+            instead of being requested one by one.
+        Takes local coordinates, works with global coordinates
+        """
+        from .toolbox import normalizeCoordinates
+        if doBlockUpdates == -1:
+            doBlockUpdates = self.placeBlockflags[0]
+        if customFlags == -1:
+            customFlags = self.placeBlockflags[1]
+        flags = doBlockUpdates, customFlags
+
+        x1, y1, z1, x2, y2, z2 = normalizeCoordinates(x1, y1, z1, x2, y2, z2)
+        if replace is not None and (not isinstance(block, str)
+                                    or not doBlockUpdates
+                                    or customFlags is not None):
+            return self.__fillByBlock(x1, y1, z1, x2, y2, z2,
+                                      block, replace, flags, worldSlice)
+
+        x1, y1, z1 = self.local2global(x1, y1, z1)
+        x2, y2, z2 = self.local2global(x2, y2, z2)
+        if replace is not None or (isinstance(block, str) and doBlockUpdates
+                                   and customFlags is None):
+            response = self.__fillCommand(x1, y1, z1, x2, y2, z2,
+                                          block, replace)
+            if self.caching:    # filled blocks are unknown
+                for key in [key for key in self.cache
+                            if x1 <= key[0] <= x2 and y1 <= key[1] <= y2
+                            and z1 <= key[2] <= z2]:
+                    del self.cache[key]
+        else:
+            response = self.__fillBuffer(x1, y1, z1, x2, y2, z2,
+                                         block, flags)
+
+        # warn once if the region leaves the build area
+        if not checkOutOfBounds(x1, y1, z1):
+            checkOutOfBounds(x2, y2, z2)
+        # mark region as decayed
+        if globalDecay is not None:
+            dx1, dy1, dz1 = global2buildlocal(x1, y1, z1)
+            dx2, dy2, dz2 = global2buildlocal(x2 + 1, y2 + 1, z2 + 1)
+            globalDecay[max(dx1, 0):max(dx2, 0),    # negative indices wrap
+                        max(dy1, 0):max(dy2, 0),
+                        max(dz1, 0):max(dz2, 0)] = True
+
+        return response
+
+    def __fillBuffer(self, x1, y1, z1, x2, y2, z2, block, flags):
+        """**Fill a region by sending or buffering all blocks at once**.
+
+        Takes global coordinates
+        """
+        from .toolbox import isSequence
+        xs, ys, zs = np.mgrid[x1:x2 + 1, y1:y2 + 1, z1:z2 + 1]
+        if isinstance(block, str) or not isSequence(block):
+            blockStrs = [block] * xs.size
+        else:
+            blockStrs = [choice(block) for _ in range(xs.size)]
+        blocks = BlockBuffer(xs.ravel().tolist(), ys.ravel().tolist(),
+                             zs.ravel().tolist(), blockStrs)
+
+        if self.__buffering:
+            if flags != self.bufferblockflags:
+                self.sendBlocks()
+                self.bufferblockflags = flags
+            self.buffer.extend(blocks)
+            if len(self.buffer) >= self.bufferlimit:
+                response = self.sendBlocks()
+            else:
+                response = '0'
+        else:
+            placed, failed, errors = self.__sendSlices(blocks, 0, 0, 0, 5,
+                                                       *flags)
+            if failed:
+                print(f"{TCOLORS['orange']}Warning: Server returned error "
+                      f"upon filling region:\n\t{TCOLORS['CLR']}"
+                      f"{repr(errors)}")
+                response = None
+            else:
+                response = str(placed)
+
+        if self.caching:
+            for x, y, z, blockStr in blocks:
+                self.cache[(x, y, z)] = blockStr
+        return response
+
+    def __fillCommand(self, x1, y1, z1, x2, y2, z2, block, replace):
+        """**Fill a region using fill commands**.
+
+        Takes global coordinates
+        """
+        self.sendBlocks()   # buffered blocks must be placed first
+        if replace is None:
+            filters = [""]
+        elif isinstance(replace, str):
+            filters = [f" replace {replace}"]
+        else:
+            filters = [f" replace {filter}" for filter in replace]
+        commands = [f"fill {bx1} {by1} {bz1} {bx2} {by2} {bz2} {block}"
+                    f"{filter}"
+                    for filter in filters
+                    for bx1, by1, bz1, bx2, by2, bz2
+                    in splitRegion(x1, y1, z1, x2, y2, z2)]
+
+        placed = 0
+        errors = []
+        for response in self.__map(di.runCommand, commands):
+            if response.startswith("Successfully filled"):
+                placed += int(response.split()[2])
+            elif response != "No blocks were filled":
+                errors.append(response)
+        if errors != []:
+            print(f"{TCOLORS['orange']}Warning: Server returned error "
+                  f"upon filling region:\n\t{TCOLORS['CLR']}{repr(errors)}")
+            return None
+        return str(placed)
+
+    def __fillByBlock(self, x1, y1, z1, x2, y2, z2, block, replace, flags,
+                      worldSlice=None):
+        """**Fill a region by checking and buffering every block**.
+
+        Takes local coordinates
+        """
+        if worldSlice is not None:
+            # check blocks locally, so they can be placed unconditionally
+            replace = [replace] if isinstance(replace, str) else replace
+        buffering = self.__buffering
+        self.__buffering = True
+        placed = 0
+        failed = False
+        for x, y, z in product(range(x1, x2 + 1), range(y1, y2 + 1),
+                               range(z1, z2 + 1)):
+            if worldSlice is None:
+                response = self.placeBlock(x, y, z, block, replace, *flags)
+            elif self.__lookupBlock(x, y, z, worldSlice) in replace:
+                response = self.placeBlock(x, y, z, block, None, *flags)
+            else:
+                continue
+            if response is not None and response.isnumeric():
+                placed += int(response)
+            else:
+                failed = True
+        self.__buffering = buffering
+        if not buffering:
+            response = self.sendBlocks()
+            if response is not None and response.isnumeric():
+                placed += int(response)
+            else:
+                failed = True
+        return None if failed else str(placed)
+
+    def __lookupBlock(self, x, y, z, worldSlice):
+        """**Return the cached block ID or the one in the worldSlice**.
+
+        If globalDecay is tracked, blocks changed since it was reset
+            are requested instead.
+        Takes local coordinates, works with global coordinates
+        """
+        gx, gy, gz = self.local2global(x, y, z)
+        if self.caching and (gx, gy, gz) in self.cache:
+            return self.cache[(gx, gy, gz)]
+        if globalDecay is not None:
+            index = decayIndex(gx, gy, gz)
+            if index is None or globalDecay[index]:
+                return self.getBlock(x, y, z)
+        return worldSlice.getBlockAt(gx, gy, gz)
+
     def getBlockFlags(self):
         """**Get default block placement flags**."""
         return self.placeBlockflags
@@ -227,7 +483,7 @@ class Interface():
 
         x, y, z = self.local2global(x, y, z)
 
-        self.buffer.append((x, y, z, blockStr))
+        self.buffer.append(x, y, z, blockStr)
         if len(self.buffer) >= limit:
             return self.sendBlocks()
         else:
@@ -236,24 +492,120 @@ class Interface():
     def sendBlocks(self, x=0, y=0, z=0, retries=5):
         """**Send the buffer to the server and clear it**.
 
+        Waits for batches sent with `sendBlocksAsync` first.
+        Blocks that could not be placed remain in the buffer.
         Since the buffer contains global coordinates
             no conversion takes place in this function
         """
-        if self.buffer == []:
+        self.awaitBlocks()
+        if len(self.buffer) == 0:
             return '0'
-        response = di.sendBlocks(self.buffer, x, y, z,
-                                 retries, *self.bufferblockflags).split('\n')
-        if all(map(lambda val: val.isnumeric(), response)):  # no errors
-            self.buffer = []
-            return str(sum(map(int, response)))
-        else:
-            print(f"{TCOLORS['orange']}Warning: Server returned error upon "
-                  f"sending block buffer:\n\t{TCOLORS['CLR']}{repr(response)}")
+        response, self.buffer = self.__sendBatch(
+            self.buffer, x, y, z, retries, *self.bufferblockflags)
+        return response
+
+    def sendBlocksAsync(self, x=0, y=0, z=0, retries=5):
+        """**Send the buffer to the server in the background and clear it**.
+
+        Return a future that resolves to what `sendBlocks` would return.
+        Batches are placed in the order they were sent.
+        NOTE: Blocks that could not be placed are not returned to the buffer,
+            as later batches may already have been placed.
+        NOTE: Blocks placed directly may be placed before pending batches.
+        """
+        if len(self.buffer) == 0:
+            batch = Future()
+            batch.set_result('0')
+            return batch
+        batch = self.buffer, x, y, z, retries, *self.bufferblockflags
+        self.buffer = BlockBuffer()
+        try:
+            self.__lastBatch = self.__dispatcher.submit(
+                lambda: self.__sendBatch(*batch)[0])
+        except RuntimeError:    # no new threads during interpreter shutdown
+            self.__lastBatch = Future()
+            self.__lastBatch.set_result(self.__sendBatch(*batch)[0])
+        return self.__lastBatch
+
+    def awaitBlocks(self):
+        """**Wait until all batches sent in the background are placed**."""
+        if self.__lastBatch is not None:
+            batch, self.__lastBatch = self.__lastBatch, None
+            batch.result()
+
+    def __sendBatch(self, blocks, x=0, y=0, z=0, retries=5,
+                    doBlockUpdates=True, customFlags=None):
+        """**Send a batch of blocks, return the response and failures**."""
+        placed, failed, errors = self.__sendSlices(
+            blocks, x, y, z, retries, doBlockUpdates, customFlags)
+        if len(failed) == 0:  # no errors
+            return str(placed), failed
+        print(f"{TCOLORS['orange']}Warning: Server returned error upon "
+              f"sending block buffer:\n\t{TCOLORS['CLR']}{repr(errors)}")
+        return None, failed
+
+    def __sendSlices(self, blocks, x=0, y=0, z=0, retries=5,
+                     doBlockUpdates=True, customFlags=None):
+        """**Send blocks in concurrent slices, retrying failed transfers**.
+
+        Slices the server answered block by block are not retried,
+            as errors for single blocks would recur.
+        Return the number of placed blocks, the blocks that could not be
+            placed and the server responses for those blocks
+        """
+        # later placements take precedence, so each position is sent once
+        blocks = blocks.unique()
+        size = max(-(-len(blocks) // SENDTHREADS), MINSLICESIZE)
+        slices = [blocks[i:i + size] for i in range(0, len(blocks), size)]
+
+        def send(blockList):
+            try:
+                response = di.putBlocks(x, y, z, blockList.body(),
+                                        doBlockUpdates, customFlags)
+            except ConnectionError:
+                return None
+            return response.split('\n')
+
+        placed = 0
+        unplaced = BlockBuffer()
+        errors = []
+        for _ in range(retries + 1):
+            failed = []
+            responses = self.__map(send, slices)
+            for blockList, response in zip(slices, responses):
+                if response is None or len(response) != len(blockList):
+                    failed.append((blockList, response))
+                    continue
+                for block, line in zip(blockList, response):
+                    if line.isnumeric():
+                        placed += int(line)
+                    else:
+                        unplaced.append(*block)
+                        errors.append(line)
+            slices = [blockList for blockList, _ in failed]
+            if slices == []:
+                break
+        for blockList, response in failed:
+            unplaced.extend(blockList)
+            errors.append("connection error" if response is None
+                          else "\n".join(response))
+        return placed, unplaced, errors
+
+    def __map(self, function, iterable):
+        """**Apply function to all items using the sending threads**."""
+        try:
+            results = self.__senders.map(function, iterable)
+        except RuntimeError:    # no new threads during interpreter shutdown
+            results = map(function, iterable)
+        return list(results)
 
     # ----------------------------------------------------- utility functions
 
     def local2global(self, x, y, z):
         """**Translate local to global coordinates**."""
+        if x is not None and y is not None and z is not None:
+            ox, oy, oz = self.offset
+            return x + ox, y + oy, z + oz
         result = []
         if x is not None:
             result.append(x + self.offset[0])
@@ -261,10 +613,13 @@ class Interface():
             result.append(y + self.offset[1])
         if z is not None:
             result.append(z + self.offset[2])
-        return result
+        return tuple(result)
 
     def global2local(self, x, y, z):
         """**Translate global to local coordinates**."""
+        if x is not None and y is not None and z is not None:
+            ox, oy, oz = self.offset
+            return x - ox, y - oy, z - oz
         result = []
         if x is not None:
             result.append(x - self.offset[0])
@@ -272,7 +627,7 @@ class Interface():
             result.append(y - self.offset[1])
         if z is not None:
             result.append(z - self.offset[2])
-        return result
+        return tuple(result)
 
 
 def runCommand(command):
@@ -398,6 +753,11 @@ def sendBlocks(x=0, y=0, z=0, retries=5):
     """**Global sendBlocks**."""
     return globalinterface.sendBlocks(x, y, z, retries)
 
+
+def sendBlocksAsync(x=0, y=0, z=0, retries=5):
+    """**Global sendBlocksAsync**."""
+    return globalinterface.sendBlocksAsync(x, y, z, retries)
+
 # ----------------------------------------------------- utility functions
 
 
@@ -413,12 +773,35 @@ def checkOutOfBounds(x, y, z, warn=True):
     return False
 
 
+def splitRegion(x1, y1, z1, x2, y2, z2, limit=FILLLIMIT):
+    """**Split a region into boxes of at most limit blocks**."""
+    dx, dy, dz = x2 - x1 + 1, y2 - y1 + 1, z2 - z1 + 1
+    sx = min(dx, limit)
+    sz = min(dz, max(1, limit // sx))
+    sy = min(dy, max(1, limit // (sx * sz)))
+    for bx in range(x1, x2 + 1, sx):
+        for bz in range(z1, z2 + 1, sz):
+            for by in range(y1, y2 + 1, sy):
+                yield (bx, by, bz, min(bx + sx - 1, x2),
+                       min(by + sy - 1, y2), min(bz + sz - 1, z2))
+
+
 def global2buildlocal(x, y, z):
     """**Convert global coordinates to ones relative to the build area**."""
     x0, y0, z0, _, _, _ = globalBuildArea
     return x - x0, y - y0, z - z0
 
 
+def decayIndex(x, y, z):
+    """**Return the index into globalDecay, or None if it is not tracked**."""
+    if globalDecay is None:
+        return None
+    index = global2buildlocal(x, y, z)
+    if all(0 <= i < n for i, n in zip(index, globalDecay.shape)):
+        return index
+    return None
+
+
 def resetGlobalDecay():
     """**Reset the global decay marker**."""
     global globalDecay
@@ -8,7 +8,9 @@ This module contains functions to:
 __all__ = ['WorldSlice']
 __version__ = "v5.0"
 
-from io import BytesIO
+import os
+from concurrent.futures import ThreadPoolExecutor
+from itertools import product
 from math import ceil, log2
 
 import nbt
@@ -17,6 +19,8 @@ import numpy as np
 from . import direct_interface as di
 from .bitarray import BitArray
 
+STRIPCHUNKS = 16    # smallest number of chunks worth a separate request
+
 
 class CachedSection:
     """**Represents a cached chunk section (16x16x16)**."""
@@ -24,6 +28,8 @@ class CachedSection:
     def __init__(self, palette, blockStatesBitArray):
         self.palette = palette
         self.blockStatesBitArray = blockStatesBitArray
+        # palette indices in y, z, x order
+        self.indices = blockStatesBitArray.toNumpy().reshape(16, 16, 16)
 
     # __repr__ displays the class well enough so __str__ is omitted
     def __repr__(self):
@@ -50,66 +56,98 @@ class WorldSlice:
                           ((self.rect[1] + self.rect[3] - 1) >> 4)
                           - (self.rect[1] >> 4) + 1)
         self.heightmapTypes = heightmapTypes
-
-        bytes = di.getChunks(*self.chunkRect, rtype='bytes')
-        file_like = BytesIO(bytes)
-
-        self.nbtfile = nbt.nbt.NBTFile(buffer=file_like)
+        # the chunk origin and width as scalars, for the accessors
+        self.__chunkX, self.__chunkZ, self.__chunkDX, _ = self.chunkRect
 
         rectOffset = [self.rect[0] % 16, self.rect[1] % 16]
 
-        # heightmaps
-        self.heightmaps = {}
-        for hmName in self.heightmapTypes:
-            self.heightmaps[hmName] = np.zeros(
-                (self.rect[2] + 1, self.rect[3] + 1), dtype=int)
+        # heightmaps are views into one array, in heightmapTypes order
+        self.heightmapStack = np.zeros(
+            (len(self.heightmapTypes), self.rect[2] + 1, self.rect[3] + 1),
+            dtype=int)
+        self.heightmaps = dict(zip(self.heightmapTypes, self.heightmapStack))
 
         # Sections are in x,z,y order!!! (reverse minecraft order :p)
         self.sections = [[[None for i in range(16)] for z in range(
             self.chunkRect[3])] for x in range(self.chunkRect[2])]
 
+        # biomes and the most common biome of each chunk, by chunkID
+        self.biomes = [None] * (self.chunkRect[2] * self.chunkRect[3])
+        self.primaryBiomes = [None] * (self.chunkRect[2] * self.chunkRect[3])
+
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            # chunks are requested concurrently in strips along the z axis
+            cx, cz, cdx, cdz = self.chunkRect
+            strips = max(1, min(os.cpu_count() or 1, cdz,
+                                cdx * cdz // STRIPCHUNKS))
+            rows = ceil(cdz / strips)
+            nbtfiles = list(executor.map(
+                self.__requestChunks,
+                [(cx, z, cdx, min(rows, cz + cdz - z))
+                 for z in range(cz, cz + cdz, rows)]))
+            # strips are in z order, so their chunks can simply be joined
+            self.nbtfile = nbtfiles[0]
+            for nbtfile in nbtfiles[1:]:
+                self.nbtfile['Chunks'].tags.extend(nbtfile['Chunks'].tags)
+
+            # chunks are decoded concurrently, each into its own part
+            for _ in executor.map(
+                    lambda xz: self.__loadChunk(*xz, rectOffset),
+                    product(range(self.chunkRect[2]),
+                            range(self.chunkRect[3]))):
+                pass
+
+    def __requestChunks(self, chunkRect):
+        """**Request and parse the chunk data of a rectangle of chunks**."""
+        with di.getChunks(*chunkRect, rtype='stream') as file_like:
+            # parsing starts while the remaining data is still arriving
+            return nbt.nbt.NBTFile(buffer=file_like)
+
+    def __loadChunk(self, x, z, rectOffset):
+        """**Decode the heightmaps, biomes and sections of a chunk**."""
+        chunkID = x + z * self.chunkRect[2]
+        chunk = self.nbtfile['Chunks'][chunkID]
+
         # heightmaps
-        for x in range(self.chunkRect[2]):
-            for z in range(self.chunkRect[3]):
-                chunkID = x + z * self.chunkRect[2]
-
-                hms = self.nbtfile['Chunks'][chunkID]['Level']['Heightmaps']
-                for hmName in self.heightmapTypes:
-                    # hmRaw = hms['MOTION_BLOCKING']
-                    hmRaw = hms[hmName]
-                    heightmapBitArray = BitArray(9, 16 * 16, hmRaw)
-                    heightmap = self.heightmaps[hmName]
-                    for cz in range(16):
-                        for cx in range(16):
-                            try:
-                                heightmap[-rectOffset[0] + x * 16 + cx,
-                                          -rectOffset[1] + z * 16 + cz] \
-                                    = heightmapBitArray.getAt(cz * 16 + cx)
-                            except IndexError:
-                                pass
+        # the chunk is clipped to the heightmap boundaries once for all types
+        startX = -rectOffset[0] + x * 16
+        startZ = -rectOffset[1] + z * 16
+        fromX, fromZ = max(startX, 0), max(startZ, 0)
+        toX = min(startX + 16, self.rect[2] + 1)
+        toZ = min(startZ + 16, self.rect[3] + 1)
+        target = slice(None), slice(fromX, toX), slice(fromZ, toZ)
+        source = (slice(None), slice(fromX - startX, toX - startX),
+                  slice(fromZ - startZ, toZ - startZ))
+
+        hms = chunk['Level']['Heightmaps']
+        values = np.stack([BitArray(9, 16 * 16, hms[hmName]).toNumpy()
+                           for hmName in self.heightmapTypes])
+        # entries are stored in z, x order
+        values = values.reshape(-1, 16, 16).transpose(0, 2, 1)
+        self.heightmapStack[target] = values[source]
+
+        # biomes
+        if 'Biomes' in chunk['Level']:
+            biomes = np.asarray(chunk['Level']['Biomes'].value, dtype=int)
+            self.biomes[chunkID] = biomes
+            self.primaryBiomes[chunkID] = np.bincount(biomes).argmax()
 
         # sections
-        for x in range(self.chunkRect[2]):
-            for z in range(self.chunkRect[3]):
-                chunkID = x + z * self.chunkRect[2]
-                chunk = self.nbtfile['Chunks'][chunkID]
-                chunkSections = chunk['Level']['Sections']
-
-                for section in chunkSections:
-                    y = section['Y'].value
+        for section in chunk['Level']['Sections']:
+            y = section['Y'].value
 
-                    if (not ('BlockStates' in section)
-                            or len(section['BlockStates']) == 0):
-                        continue
+            if (not ('BlockStates' in section)
+                    or len(section['BlockStates']) == 0):
+                continue
 
-                    palette = section['Palette']
-                    rawBlockStates = section['BlockStates']
-                    bitsPerEntry = max(4, ceil(log2(len(palette))))
-                    blockStatesBitArray = BitArray(bitsPerEntry, 16 * 16 * 16,
-                                                   rawBlockStates)
+            palette = section['Palette']
+            rawBlockStates = section['BlockStates']
+            bitsPerEntry = max(4, ceil(log2(len(palette))))
+            blockStatesBitArray = BitArray(bitsPerEntry, 16 * 16 * 16,
+                                           rawBlockStates)
 
-                    self.sections[x][z][y] = CachedSection(palette,
-                                                           blockStatesBitArray)
+            self.sections[x][z][y] = CachedSection(palette,
+                                                   blockStatesBitArray)
 
     # __repr__ displays the class well enough so __str__ is omitted
     def __repr__(self):
@@ -120,8 +158,8 @@ class WorldSlice:
 
     def getBlockCompoundAt(self, x, y, z):
         """**Return block data**."""
-        chunkX = (x >> 4) - self.chunkRect[0]
-        chunkZ = (z >> 4) - self.chunkRect[1]
+        chunkX = (x >> 4) - self.__chunkX
+        chunkZ = (z >> 4) - self.__chunkZ
         chunkY = y >> 4
 
         cachedSection = self.sections[chunkX][chunkZ][chunkY]
@@ -129,12 +167,8 @@ class WorldSlice:
         if cachedSection is None:
             return None  # TODO return air compound instead
 
-        bitarray = cachedSection.blockStatesBitArray
-        palette = cachedSection.palette
-
-        blockIndex = (y % 16) * 16 * 16 + \
-            (z % 16) * 16 + x % 16
-        return palette[bitarray.getAt(blockIndex)]
+        return cachedSection.palette[
+            cachedSection.indices[y & 15, z & 15, x & 15]]
 
     def getBlockAt(self, x, y, z):
         """**Return the block's namespaced id at blockPos**."""
@@ -151,8 +185,7 @@ class WorldSlice:
             there is an inacurracy of +/-2 blocks.
         """
         from .lookup import BIOMES
-        chunkID = x // 16 + z // 16 * self.chunkRect[2]
-        data = self.nbtfile['Chunks'][chunkID]['Level']['Biomes']
+        data = self.biomes[self.__chunkID(x, z)]
         x = (x % 16) // 4
         z = (z % 16) // 4
         y = y // 4
@@ -162,16 +195,16 @@ class WorldSlice:
     def getBiomesNear(self, x, y, z):
         """**Return a list of biomes in the same chunk**."""
         from .lookup import BIOMES
-        chunkID = x // 16 + z // 16 * self.chunkRect[2]
-        data = self.nbtfile['Chunks'][chunkID]['Level']['Biomes']
-        # "sorted(list(set(data)))" is used to remove duplicates from data
-        return [BIOMES[i] for i in sorted(list(set(data)))]
+        data = self.biomes[self.__chunkID(x, z)]
+        # np.unique returns the sorted biomes without duplicates
+        return [BIOMES[i] for i in np.unique(data)]
 
     def getPrimaryBiomeNear(self, x, y, z):
         """**Return the most prevelant biome in the same chunk**."""
         from .lookup import BIOMES
-        chunkID = x // 16 + z // 16 * self.chunkRect[2]
-        data = self.nbtfile['Chunks'][chunkID]['Level']['Biomes']
-        # "max(set(data), key=data.count)" is used to find the most common item
-        data = max(set(data), key=data.count)
-        return [BIOMES[i] for i in sorted(list(set(data)))]
+        return BIOMES[self.primaryBiomes[self.__chunkID(x, z)]]
+
+    def __chunkID(self, x, z):
+        """**Return the chunkID of the chunk containing x, z**."""
+        return ((x >> 4) - self.__chunkX
+                + ((z >> 4) - self.__chunkZ) * self.__chunkDX)
@@ -15,7 +15,8 @@ import random
 import sys
 import time
 
-from gdpc import direct_interface, geometry, interface, lookup, toolbox
+from gdpc import (bitarray, direct_interface, geometry, interface, lookup,
+                  toolbox)
 
 # import timeit
 
@@ -23,7 +24,6 @@ from gdpc import direct_interface, geometry, interface, lookup, toolbox
 # import visualizeMap
 # import worldLoader
 # import example
-# import bitarray
 
 
 class TestException(Exception):
@@ -104,6 +104,30 @@ def testSynchronisation():
     print(f"{lookup.TCOLORS['green']}Synchronization test complete!")
 
 
+def testBitArray():
+    """Check that decoding whole BitArrays matches decoding single entries."""
+    print(f"\n{lookup.TCOLORS['yellow']}Running BitArray test...")
+
+    errors = []
+    for bitsPerEntry in (4, 5, 8, 9, 13):
+        entriesPerLong = 64 // bitsPerEntry
+        longCount = 64
+        # leave the last long partially used
+        arraySize = longCount * entriesPerLong - entriesPerLong // 2
+        longs = [random.randint(-2 ** 63, 2 ** 63 - 1)
+                 for _ in range(longCount)]
+        bits = bitarray.BitArray(bitsPerEntry, arraySize, longs)
+        expected = [bits.getAt(i) for i in range(arraySize)]
+        if bits.toNumpy().tolist() != expected:
+            errors.append(bitsPerEntry)
+
+    if errors != []:
+        raise TestException("BitArray.toNumpy() does not match getAt() "
+                            f"for {errors} bits per entry.")
+
+    print(f"{lookup.TCOLORS['green']}BitArray test complete!")
+
+
 def testShapes():
     """**Check shape construction**."""
     # TODO: Fill me!
@@ -299,7 +323,7 @@ def testCache():
         """Clean testbed for placement from memory."""
         print("\t\tWiping blocks...", end="\r")
         geometry.placeVolume(0, 1, 0, SIZE - 1, 1, SIZE - 1,
-                             "shroomlight", tester)
+                             "shroomlight", interface=tester)
         tester.sendBlocks()
         print("\n\t\tWiping blocks done.")
 
@@ -357,8 +381,10 @@ def testCache():
     # ---- preparation
     print(f"\t{lookup.TCOLORS['gray']}Preparing...", end="\r")
     tester = interface.Interface(buffering=True, bufferlimit=SIZE ** 2)
-    geometry.placeVolume(0, 2, 0, SIZE - 1, 2, SIZE - 1, "bedrock", tester)
-    geometry.placeVolume(0, 0, 0, SIZE - 1, 1, SIZE - 1, "air", tester)
+    geometry.placeVolume(0, 2, 0, SIZE - 1, 2, SIZE - 1, "bedrock",
+                         interface=tester)
+    geometry.placeVolume(0, 0, 0, SIZE - 1, 1, SIZE - 1, "air",
+                         interface=tester)
     tester.sendBlocks()
     tester.cache.maxsize = (SIZE ** 2)
     print("\tPerparing done.")
@@ -428,13 +454,14 @@ def testCache():
 
     # ---- cleanup
     print(f"{lookup.TCOLORS['green']}Cache test complete!")
-    geometry.placeVolume(0, 0, 0, SIZE, 1, SIZE, "bedrock", tester)
+    geometry.placeVolume(0, 0, 0, SIZE, 1, SIZE, "bedrock", interface=tester)
     interface.globalWorldSlice = None
     interface.globalDecay = None
 
 
 if __name__ == '__main__':
-    AUTOTESTS = (verifyPaletteBlocks, testCache, testSynchronisation)
+    AUTOTESTS = (testBitArray, verifyPaletteBlocks, testCache,
+                 testSynchronisation)
     MANUALTESTS = (testBooks, testShapes)
     tests = AUTOTESTS + MANUALTESTS
 